@@ -1,8 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import io
 import os
 import subprocess
 import tempfile
-from PIL import Image, ImageChops
+import numpy as np
+from PIL import Image
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -12,21 +15,29 @@ except ModuleNotFoundError:
     from imagemagick import resolve_imagemagick
 
 
+def _nonwhite_bbox(im: Image.Image, padding: int) -> tuple[int, int, int, int] | None:
+    # Bounding box of non-white pixels via vectorized comparison; avoids
+    # materializing a second white image plus a full-difference image.
+    arr = np.asarray(im)
+    mask = (arr < 255).any(axis=2)
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+
+    left = max(int(cols[0]) - padding, 0)
+    top = max(int(rows[0]) - padding, 0)
+    right = min(int(cols[-1]) + 1 + padding, im.width)
+    bottom = min(int(rows[-1]) + 1 + padding, im.height)
+    return left, top, right, bottom
+
+
 def crop_white_margins(png_path: Path, padding: int = 10):
     im = Image.open(png_path).convert("RGB")
-    bg = Image.new("RGB", im.size, (255, 255, 255))
-    diff = ImageChops.difference(im, bg)
-    bbox = diff.getbbox()
-    if not bbox:
+    bbox = _nonwhite_bbox(im, padding)
+    if bbox is None:
         return
-
-    left, top, right, bottom = bbox
-    left = max(left - padding, 0)
-    top = max(top - padding, 0)
-    right = min(right + padding, im.width)
-    bottom = min(bottom + padding, im.height)
-
-    im.crop((left, top, right, bottom)).save(png_path)
+    im.crop(bbox).save(png_path)
 
 
 def convert_wmf_to_png(image_dir: str):
@@ -43,46 +54,69 @@ def convert_wmf_to_png(image_dir: str):
     if magick is None:
         raise RuntimeError("ImageMagick not found")
 
-    for wmf in wmf_files:
-        png = wmf.with_suffix(".png")
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+
+        # One LibreOffice invocation for all WMFs: startup takes seconds and
+        # dominates per-file conversion cost, so never pay it more than once.
+        subprocess.run(
+            [
+                "libreoffice",
+                "--headless",
+                "--convert-to", "pdf",
+                "--outdir", str(tmpdir),
+                *map(str, wmf_files),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+
+        tasks: list[tuple[Path, Path, Path]] = []
+        for wmf in wmf_files:
             pdf = tmpdir / f"{wmf.stem}.pdf"
-
-            subprocess.run(
-                [
-                    "libreoffice",
-                    "--headless",
-                    "--convert-to", "pdf",
-                    "--outdir", str(tmpdir),
-                    str(wmf),
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-
             if not pdf.exists():
                 raise RuntimeError("LibreOffice did not produce PDF from WMF")
-
-            subprocess.run(
-                magick.command + [
-                    "-density", str(density),
-                    str(pdf),
-                    str(png),
-                ],
-                check=True,
-                env=magick.env,
-                capture_output=True,
-                text=True,
-            )
-
-            # ✅ FIX DỨT ĐIỂM Ở ĐÂY
-            crop_white_margins(png, padding=10)
-
-            if png.exists():
-                try:
-                    wmf.unlink()
-                except Exception:
-                    pass
+            tasks.append((pdf, wmf.with_suffix(".png"), wmf))
+
+        if len(tasks) == 1:
+            pdf, png, wmf = tasks[0]
+            _rasterize_and_crop(pdf, png, wmf, density, magick)
+        else:
+            # Rasterization + crop is independent per file; fan out over cores.
+            workers = min(len(tasks), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_rasterize_and_crop, pdf, png, wmf, density, magick)
+                    for pdf, png, wmf in tasks
+                ]
+                for future in futures:
+                    future.result()
+
+
+def _rasterize_and_crop(pdf: Path, png: Path, wmf: Path, density: int, magick) -> None:
+    # Rasterize to stdout and crop in memory: the PNG only hits disk once,
+    # instead of magick-write -> PIL-read -> PIL-write.
+    result = subprocess.run(
+        magick.command + [
+            "-density", str(density),
+            str(pdf),
+            "png:-",
+        ],
+        check=True,
+        env=magick.env,
+        capture_output=True,
+    )
+
+    im = Image.open(io.BytesIO(result.stdout)).convert("RGB")
+
+    # ✅ FIX DỨT ĐIỂM Ở ĐÂY
+    bbox = _nonwhite_bbox(im, padding=10)
+    if bbox is not None:
+        im = im.crop(bbox)
+    im.save(png)
+
+    try:
+        wmf.unlink()
+    except Exception:
+        pass
@@ -1,8 +1,11 @@
+import contextlib
+import functools
 import re
-import xml.etree.ElementTree as ET
 import zipfile
 from pathlib import Path
 
+from lxml import etree as ET
+
 NS_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
 NS_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
 NS_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
@@ -23,12 +26,121 @@ M = f"{{{NS_M}}}"
 PR = f"{{{NS_PR}}}"
 MML = f"{{{NS_MML}}}"
 
-ET.register_namespace("", NS_MML)
+# Precomputed tag / find-path constants. The parse loops and the OMML
+# conversion visit every element of the document, so avoid rebuilding these
+# f-strings on each visit.
+_W_BODY = f"{W}body"
+_W_P = f"{W}p"
+_W_TBL = f"{W}tbl"
+_W_R = f"{W}r"
+_W_T = f"{W}t"
+_W_TAB = f"{W}tab"
+_W_BR = f"{W}br"
+_W_CR = f"{W}cr"
+_W_DRAWING = f"{W}drawing"
+_W_OBJECT = f"{W}object"
+_W_PICT = f"{W}pict"
+_W_HYPERLINK = f"{W}hyperlink"
+_W_SDT = f"{W}sdt"
+_W_SMART_TAG = f"{W}smartTag"
+_W_VAL = f"{W}val"
+_W_FILL = f"{W}fill"
+_W_TYPE = f"{W}type"
+_W_RPR_PATH = f"./{W}rPr"
+_W_HIGHLIGHT_PATH = f"./{W}highlight"
+_W_SHD_PATH = f"./{W}shd"
+_W_SDT_CONTENT_PATH = f"./{W}sdtContent"
+_W_TR_PATH = f"./{W}tr"
+_W_TC_PATH = f"./{W}tc"
+_W_TCPR_PATH = f"./{W}tcPr"
+_W_GRID_SPAN_PATH = f"./{W}gridSpan"
+
+_R_EMBED = f"{R}embed"
+_R_ID = f"{R}id"
+_R_HREF = f"{R}href"
+
+_A_BLIP = f"{A}blip"
+_WP_EXTENT = f"{WP}extent"
+_V_IMAGEDATA = f"{V}imagedata"
+_V_SHAPE = f"{V}shape"
+_O_OLE = f"{O}OLEObject"
+_PR_RELATIONSHIP_PATH = f".//{PR}Relationship"
+
+_M_OMATH = f"{M}oMath"
+_M_OMATHPARA = f"{M}oMathPara"
+_M_E = f"{M}e"
+_M_R = f"{M}r"
+_M_T = f"{M}t"
+_M_SSUB = f"{M}sSub"
+_M_SSUP = f"{M}sSup"
+_M_SSUBSUP = f"{M}sSubSup"
+_M_F = f"{M}f"
+_M_RAD = f"{M}rad"
+_M_D = f"{M}d"
+_M_NARY = f"{M}nary"
+_M_VAL = f"{M}val"
+_M_E_PATH = f"./{M}e"
+_M_T_PATH = f"./{M}t"
+_M_NUM_E_PATH = f"./{M}num/{M}e"
+_M_NUM_PATH = f"./{M}num"
+_M_DEN_E_PATH = f"./{M}den/{M}e"
+_M_DEN_PATH = f"./{M}den"
+_M_DEG_E_PATH = f"./{M}deg/{M}e"
+_M_DEG_PATH = f"./{M}deg"
+_M_DPR_PATH = f"./{M}dPr"
+_M_BEG_CHR_PATH = f"./{M}begChr"
+_M_END_CHR_PATH = f"./{M}endChr"
+_M_NARY_PR_PATH = f"./{M}naryPr"
+_M_CHR_PATH = f"./{M}chr"
+
+# Property children skipped during OMML conversion. Enumerating the schema's
+# *Pr elements lets the hot loop use one set-membership test instead of two
+# str.endswith scans per child. w:rPr is included because math runs carry
+# regular Word run properties.
+_OMML_SKIP_TAGS = frozenset(
+    [
+        f"{W}rPr",
+        *(
+            M + name
+            for name in (
+                "rPr",
+                "ctrlPr",
+                "accPr",
+                "argPr",
+                "barPr",
+                "borderBoxPr",
+                "boxPr",
+                "dPr",
+                "eqArrPr",
+                "fPr",
+                "funcPr",
+                "groupChrPr",
+                "limLowPr",
+                "limUppPr",
+                "mPr",
+                "mcPr",
+                "mcsPr",
+                "naryPr",
+                "oMathParaPr",
+                "phantPr",
+                "radPr",
+                "sPrePr",
+                "sSubPr",
+                "sSubSupPr",
+                "sSupPr",
+            )
+        ),
+    ]
+)
 
 EMU_PER_PX = 9525  # 914400 EMU per inch / 96 px per inch
 PX_PER_PT = 96 / 72
 
+_WIDTH_RE = re.compile(r"width:([0-9.]+)pt")
+_HEIGHT_RE = re.compile(r"height:([0-9.]+)pt")
+
 
+@functools.lru_cache(maxsize=2048)
 def _emu_to_px(value: str | None) -> int | None:
     if not value:
         return None
@@ -38,6 +150,8 @@ def _emu_to_px(value: str | None) -> int | None:
         return None
 
 
+# Documents reuse identical image dimensions, so cache both converters.
+@functools.lru_cache(maxsize=2048)
 def _style_pt_to_px(style: str | None) -> tuple[int | None, int | None]:
     if not style:
         return None, None
@@ -45,32 +159,51 @@ def _style_pt_to_px(style: str | None) -> tuple[int | None, int | None]:
     width = None
     height = None
 
-    width_match = re.search(r"width:([0-9.]+)pt", style)
+    width_match = _WIDTH_RE.search(style)
     if width_match:
         width = max(1, int(round(float(width_match.group(1)) * PX_PER_PT)))
 
-    height_match = re.search(r"height:([0-9.]+)pt", style)
+    height_match = _HEIGHT_RE.search(style)
     if height_match:
         height = max(1, int(round(float(height_match.group(1)) * PX_PER_PT)))
 
     return width, height
 
 
-def _run_has_highlight(run: ET.Element) -> bool:
+def _run_has_highlight(
+    run: ET.Element,
+    cache: dict[int, tuple[ET.Element, bool]] | None = None,
+) -> bool:
     """
     Detect highlight/shading on a run.
 
     Word may store highlight as <w:highlight w:val="yellow"/> or as shading
     <w:shd w:fill="FFFF00"/> when users use the paint/highlight UI.
+
+    `cache` memoizes results per rPr element for one document. The cached
+    entry keeps the element itself alive so its id() stays unique (lxml
+    proxies may be collected and their ids reused otherwise).
     """
-    rpr = run.find(f"./{W}rPr")
+    rpr = run.find(_W_RPR_PATH)
     if rpr is None:
         return False
 
-    highlight = rpr.find(f"./{W}highlight")
+    if cache is not None:
+        hit = cache.get(id(rpr))
+        if hit is not None:
+            return hit[1]
+
+    result = _rpr_has_highlight(rpr)
+    if cache is not None:
+        cache[id(rpr)] = (rpr, result)
+    return result
+
+
+def _rpr_has_highlight(rpr: ET.Element) -> bool:
+    highlight = rpr.find(_W_HIGHLIGHT_PATH)
     if highlight is not None:
         val = (
-            highlight.get(f"{W}val")
+            highlight.get(_W_VAL)
             or highlight.get("val")
             or highlight.get("w:val")
             or ""
@@ -78,16 +211,16 @@ def _run_has_highlight(run: ET.Element) -> bool:
         if val and val.lower() not in {"none", "auto"}:
             return True
 
-    shd = rpr.find(f"./{W}shd")
+    shd = rpr.find(_W_SHD_PATH)
     if shd is not None:
-        fill = shd.get(f"{W}fill") or shd.get("fill") or shd.get("w:fill") or ""
+        fill = shd.get(_W_FILL) or shd.get("fill") or shd.get("w:fill") or ""
         if fill and fill.lower() not in {"none", "auto", "000000"}:
             return True
 
     return False
 
 
-_OMML_OPERATORS = {
+_OMML_OPERATORS = frozenset({
     "+",
     "-",
     "−",
@@ -118,7 +251,7 @@ _OMML_OPERATORS = {
     ".",
     "!",
     "?",
-}
+})
 
 
 def _mml(tag: str, text: str | None = None, attrib: dict[str, str] | None = None) -> ET.Element:
@@ -142,7 +275,12 @@ def _wrap_mrow(nodes: list[ET.Element]) -> ET.Element:
 def _omml_get_val(elem: ET.Element | None) -> str | None:
     if elem is None:
         return None
-    return elem.get(f"{M}val") or elem.get("val")
+    return elem.get(_M_VAL) or elem.get("val")
+
+
+# Tokenizer for math run text: number runs (decimal separators allowed after
+# the first digit), letter runs, whitespace runs, then any single char.
+_OMML_TEXT_RE = re.compile(r"(\d[\d.,]*)|([^\W\d_]+)|(\s+)|(.)", re.DOTALL)
 
 
 def _omml_text_to_mathml_nodes(text: str) -> list[ET.Element]:
@@ -150,53 +288,19 @@ def _omml_text_to_mathml_nodes(text: str) -> list[ET.Element]:
     if not text:
         return nodes
 
-    buf = ""
-    mode: str | None = None  # "alpha" | "num" | "space"
-
-    def flush():
-        nonlocal buf, mode
-        if not buf:
-            return
-        if mode == "space":
+    for match in _OMML_TEXT_RE.finditer(text):
+        num, alpha, space, other = match.groups()
+        if num is not None:
+            nodes.append(_mml("mn", num))
+        elif alpha is not None:
+            nodes.append(_mml("mi", alpha))
+        elif space is not None:
             nodes.append(_mml("mtext", " "))
-        elif mode == "num":
-            nodes.append(_mml("mn", buf))
-        elif mode == "alpha":
-            nodes.append(_mml("mi", buf))
+        elif other in _OMML_OPERATORS:
+            nodes.append(_mml("mo", other))
         else:
-            nodes.append(_mml("mtext", buf))
-        buf = ""
-        mode = None
-
-    for ch in text:
-        if ch.isspace():
-            if mode != "space":
-                flush()
-            buf = " "
-            mode = "space"
-            continue
-
-        if ch.isalpha():
-            if mode not in ("alpha",):
-                flush()
-            buf += ch
-            mode = "alpha"
-            continue
-
-        if ch.isdigit() or (mode == "num" and ch in {".", ","}):
-            if mode not in ("num",):
-                flush()
-            buf += ch
-            mode = "num"
-            continue
+            nodes.append(_mml("mtext", other))
 
-        flush()
-        if ch in _OMML_OPERATORS:
-            nodes.append(_mml("mo", ch))
-        else:
-            nodes.append(_mml("mtext", ch))
-
-    flush()
     return nodes
 
 
@@ -204,150 +308,166 @@ def _omml_child_expr(parent: ET.Element, tag_local: str) -> ET.Element | None:
     container = parent.find(f"./{M}{tag_local}")
     if container is None:
         return None
-    expr = container.find(f"./{M}e")
+    expr = container.find(_M_E_PATH)
     return expr if expr is not None else container
 
 
-def _omml_nodes_to_mathml_nodes(elem: ET.Element | None) -> list[ET.Element]:
-    if elem is None:
-        return []
-
-    tag = elem.tag
-
-    # Containers
-    if tag in (f"{M}oMath", f"{M}oMathPara", f"{M}e"):
-        nodes: list[ET.Element] = []
-        for child in list(elem):
-            if child.tag.endswith("Pr") or child.tag.endswith("ctrlPr"):
-                continue
-            nodes.extend(_omml_nodes_to_mathml_nodes(child))
-        return nodes
-
-    # Text runs
-    if tag == f"{M}r":
-        text_parts: list[str] = []
-        for t in elem.findall(f"./{M}t"):
-            if t.text:
-                text_parts.append(t.text)
-        if text_parts:
-            return _omml_text_to_mathml_nodes("".join(text_parts))
-
-        nodes: list[ET.Element] = []
-        for child in list(elem):
-            if child.tag.endswith("Pr") or child.tag.endswith("ctrlPr"):
-                continue
-            nodes.extend(_omml_nodes_to_mathml_nodes(child))
-        return nodes
-
-    if tag == f"{M}t":
-        return _omml_text_to_mathml_nodes(elem.text or "")
-
-    # Sub / Sup
-    if tag == f"{M}sSub":
-        base = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(f"./{M}e")))
-        sub = _wrap_mrow(_omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sub")))
-        msub = _mml("msub")
-        msub.append(base)
-        msub.append(sub)
-        return [msub]
-
-    if tag == f"{M}sSup":
-        base = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(f"./{M}e")))
-        sup = _wrap_mrow(_omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sup")))
-        msup = _mml("msup")
-        msup.append(base)
-        msup.append(sup)
-        return [msup]
-
-    if tag == f"{M}sSubSup":
-        base = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(f"./{M}e")))
-        sub = _wrap_mrow(_omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sub")))
-        sup = _wrap_mrow(_omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sup")))
-        msubsup = _mml("msubsup")
-        msubsup.append(base)
-        msubsup.append(sub)
-        msubsup.append(sup)
-        return [msubsup]
-
-    # Fractions
-    if tag == f"{M}f":
-        num = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(f"./{M}num/{M}e") or elem.find(f"./{M}num")))
-        den = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(f"./{M}den/{M}e") or elem.find(f"./{M}den")))
-        mfrac = _mml("mfrac")
-        mfrac.append(num)
-        mfrac.append(den)
-        return [mfrac]
-
-    # Roots
-    if tag == f"{M}rad":
-        deg = elem.find(f"./{M}deg/{M}e") or elem.find(f"./{M}deg")
-        radicand = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(f"./{M}e")))
-        deg_nodes = _omml_nodes_to_mathml_nodes(deg) if deg is not None else []
-
-        if deg_nodes:
-            mroot = _mml("mroot")
-            mroot.append(radicand)
-            mroot.append(_wrap_mrow(deg_nodes))
-            return [mroot]
-
-        msqrt = _mml("msqrt")
-        msqrt.append(radicand)
-        return [msqrt]
-
-    # Delimiters
-    if tag == f"{M}d":
-        dpr = elem.find(f"./{M}dPr")
-        open_chr = _omml_get_val(dpr.find(f"./{M}begChr") if dpr is not None else None)
-        close_chr = _omml_get_val(dpr.find(f"./{M}endChr") if dpr is not None else None)
-        attrib: dict[str, str] = {}
-        if open_chr:
-            attrib["open"] = open_chr
-        if close_chr:
-            attrib["close"] = close_chr
-        mfenced = _mml("mfenced", attrib=attrib)
-        for node in _omml_nodes_to_mathml_nodes(elem.find(f"./{M}e")):
-            mfenced.append(node)
-        return [mfenced]
-
-    # N-ary (sum, integral, ...)
-    if tag == f"{M}nary":
-        nary_pr = elem.find(f"./{M}naryPr")
-        op = _omml_get_val(nary_pr.find(f"./{M}chr") if nary_pr is not None else None) or "∑"
-        op_node = _mml("mo", op)
-
-        sub_nodes = _omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sub"))
-        sup_nodes = _omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sup"))
-
-        if sub_nodes and sup_nodes:
-            wrapper = _mml("munderover")
-            wrapper.append(op_node)
-            wrapper.append(_wrap_mrow(sub_nodes))
-            wrapper.append(_wrap_mrow(sup_nodes))
-            return [wrapper, *_omml_nodes_to_mathml_nodes(elem.find(f"./{M}e"))]
-
-        if sub_nodes:
-            wrapper = _mml("munder")
-            wrapper.append(op_node)
-            wrapper.append(_wrap_mrow(sub_nodes))
-            return [wrapper, *_omml_nodes_to_mathml_nodes(elem.find(f"./{M}e"))]
-
-        if sup_nodes:
-            wrapper = _mml("mover")
-            wrapper.append(op_node)
-            wrapper.append(_wrap_mrow(sup_nodes))
-            return [wrapper, *_omml_nodes_to_mathml_nodes(elem.find(f"./{M}e"))]
-
-        return [op_node, *_omml_nodes_to_mathml_nodes(elem.find(f"./{M}e"))]
-
-    # Fallback: keep best-effort ordering of children.
+def _omml_children_to_nodes(elem: ET.Element) -> list[ET.Element]:
+    """Convert all non-property children; also the fallback for unknown tags."""
     nodes: list[ET.Element] = []
     for child in list(elem):
-        if child.tag.endswith("Pr") or child.tag.endswith("ctrlPr"):
+        if child.tag in _OMML_SKIP_TAGS:
             continue
         nodes.extend(_omml_nodes_to_mathml_nodes(child))
     return nodes
 
 
+def _omml_handle_r(elem: ET.Element) -> list[ET.Element]:
+    text_parts: list[str] = []
+    for t in elem.findall(_M_T_PATH):
+        if t.text:
+            text_parts.append(t.text)
+    if text_parts:
+        return _omml_text_to_mathml_nodes("".join(text_parts))
+    return _omml_children_to_nodes(elem)
+
+
+def _omml_handle_t(elem: ET.Element) -> list[ET.Element]:
+    return _omml_text_to_mathml_nodes(elem.text or "")
+
+
+def _omml_handle_ssub(elem: ET.Element) -> list[ET.Element]:
+    base = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH)))
+    sub = _wrap_mrow(_omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sub")))
+    msub = _mml("msub")
+    msub.append(base)
+    msub.append(sub)
+    return [msub]
+
+
+def _omml_handle_ssup(elem: ET.Element) -> list[ET.Element]:
+    base = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH)))
+    sup = _wrap_mrow(_omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sup")))
+    msup = _mml("msup")
+    msup.append(base)
+    msup.append(sup)
+    return [msup]
+
+
+def _omml_handle_ssubsup(elem: ET.Element) -> list[ET.Element]:
+    base = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH)))
+    sub = _wrap_mrow(_omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sub")))
+    sup = _wrap_mrow(_omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sup")))
+    msubsup = _mml("msubsup")
+    msubsup.append(base)
+    msubsup.append(sub)
+    msubsup.append(sup)
+    return [msubsup]
+
+
+def _omml_handle_f(elem: ET.Element) -> list[ET.Element]:
+    num_elem = elem.find(_M_NUM_E_PATH)
+    if num_elem is None:
+        num_elem = elem.find(_M_NUM_PATH)
+    den_elem = elem.find(_M_DEN_E_PATH)
+    if den_elem is None:
+        den_elem = elem.find(_M_DEN_PATH)
+    num = _wrap_mrow(_omml_nodes_to_mathml_nodes(num_elem))
+    den = _wrap_mrow(_omml_nodes_to_mathml_nodes(den_elem))
+    mfrac = _mml("mfrac")
+    mfrac.append(num)
+    mfrac.append(den)
+    return [mfrac]
+
+
+def _omml_handle_rad(elem: ET.Element) -> list[ET.Element]:
+    deg = elem.find(_M_DEG_E_PATH)
+    if deg is None:
+        deg = elem.find(_M_DEG_PATH)
+    radicand = _wrap_mrow(_omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH)))
+    deg_nodes = _omml_nodes_to_mathml_nodes(deg) if deg is not None else []
+
+    if deg_nodes:
+        mroot = _mml("mroot")
+        mroot.append(radicand)
+        mroot.append(_wrap_mrow(deg_nodes))
+        return [mroot]
+
+    msqrt = _mml("msqrt")
+    msqrt.append(radicand)
+    return [msqrt]
+
+
+def _omml_handle_d(elem: ET.Element) -> list[ET.Element]:
+    dpr = elem.find(_M_DPR_PATH)
+    open_chr = _omml_get_val(dpr.find(_M_BEG_CHR_PATH) if dpr is not None else None)
+    close_chr = _omml_get_val(dpr.find(_M_END_CHR_PATH) if dpr is not None else None)
+    attrib: dict[str, str] = {}
+    if open_chr:
+        attrib["open"] = open_chr
+    if close_chr:
+        attrib["close"] = close_chr
+    mfenced = _mml("mfenced", attrib=attrib)
+    for node in _omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH)):
+        mfenced.append(node)
+    return [mfenced]
+
+
+def _omml_handle_nary(elem: ET.Element) -> list[ET.Element]:
+    nary_pr = elem.find(_M_NARY_PR_PATH)
+    op = _omml_get_val(nary_pr.find(_M_CHR_PATH) if nary_pr is not None else None) or "∑"
+    op_node = _mml("mo", op)
+
+    sub_nodes = _omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sub"))
+    sup_nodes = _omml_nodes_to_mathml_nodes(_omml_child_expr(elem, "sup"))
+
+    if sub_nodes and sup_nodes:
+        wrapper = _mml("munderover")
+        wrapper.append(op_node)
+        wrapper.append(_wrap_mrow(sub_nodes))
+        wrapper.append(_wrap_mrow(sup_nodes))
+        return [wrapper, *_omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH))]
+
+    if sub_nodes:
+        wrapper = _mml("munder")
+        wrapper.append(op_node)
+        wrapper.append(_wrap_mrow(sub_nodes))
+        return [wrapper, *_omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH))]
+
+    if sup_nodes:
+        wrapper = _mml("mover")
+        wrapper.append(op_node)
+        wrapper.append(_wrap_mrow(sup_nodes))
+        return [wrapper, *_omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH))]
+
+    return [op_node, *_omml_nodes_to_mathml_nodes(elem.find(_M_E_PATH))]
+
+
+# O(1) tag dispatch instead of a chain of tag comparisons per node.
+_OMML_HANDLERS: dict[str, object] = {
+    _M_OMATH: _omml_children_to_nodes,
+    _M_OMATHPARA: _omml_children_to_nodes,
+    _M_E: _omml_children_to_nodes,
+    _M_R: _omml_handle_r,
+    _M_T: _omml_handle_t,
+    _M_SSUB: _omml_handle_ssub,
+    _M_SSUP: _omml_handle_ssup,
+    _M_SSUBSUP: _omml_handle_ssubsup,
+    _M_F: _omml_handle_f,
+    _M_RAD: _omml_handle_rad,
+    _M_D: _omml_handle_d,
+    _M_NARY: _omml_handle_nary,
+}
+
+
+def _omml_nodes_to_mathml_nodes(elem: ET.Element | None) -> list[ET.Element]:
+    if elem is None:
+        return []
+    # Unknown tags fall back to best-effort conversion of their children.
+    handler = _OMML_HANDLERS.get(elem.tag, _omml_children_to_nodes)
+    return handler(elem)
+
+
 def _omml_to_mathml(elem: ET.Element, *, display: str = "inline") -> str | None:
     nodes = _omml_nodes_to_mathml_nodes(elem)
     if not nodes:
@@ -355,7 +475,8 @@ def _omml_to_mathml(elem: ET.Element, *, display: str = "inline") -> str | None:
     attrib: dict[str, str] = {}
     if display and display != "inline":
         attrib["display"] = display
-    math = _mml("math", attrib=attrib)
+    # lxml has no register_namespace; bind MathML as the default namespace here.
+    math = ET.Element(f"{MML}math", attrib, nsmap={None: NS_MML})
     row = _mml("mrow")
     for node in nodes:
         row.append(node)
@@ -363,10 +484,57 @@ def _omml_to_mathml(elem: ET.Element, *, display: str = "inline") -> str | None:
     return ET.tostring(math, encoding="unicode")
 
 
-def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
+# Tags scanned when walking body/cell content and paragraph content. Wrapper
+# tags (hyperlink/sdt/smartTag) are descended into transparently.
+_BLOCK_SCAN_TAGS = (_W_P, _W_TBL, _W_SDT, _W_SMART_TAG)
+_INLINE_SCAN_TAGS = (_W_R, _M_OMATH, _M_OMATHPARA, _W_HYPERLINK, _W_SDT, _W_SMART_TAG)
+
+
+def _iter_wrapped(container: ET.Element, scan_tags: tuple[str, ...]):
+    """
+    Yield matching descendants of `container` in document order, descending
+    through hyperlink/sdt/smartTag wrappers. Uses lxml's C-level tag-filtered
+    `iterchildren` with an explicit stack instead of recursive generators, so
+    uninteresting children are never surfaced to Python.
+    """
+    stack = [container.iterchildren(*scan_tags)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
+        tag = child.tag
+        if tag == _W_SDT:
+            sdt_content = child.find(_W_SDT_CONTENT_PATH)
+            if sdt_content is not None:
+                stack.append(sdt_content.iterchildren(*scan_tags))
+            continue
+        if tag == _W_SMART_TAG or tag == _W_HYPERLINK:
+            stack.append(child.iterchildren(*scan_tags))
+            continue
+        yield child
+
+
+def parse_flow(
+    docx_path: str,
+    image_dir: str = "extracted_images",
+    *,
+    with_root: bool = False,
+    zf: zipfile.ZipFile | None = None,
+):
+    """
+    Parse document flow into blocks.
+
+    With `with_root=True`, returns `(blocks, root)` so callers can reuse the
+    parsed `word/document.xml` tree (e.g. formula extraction) instead of
+    re-reading and re-parsing the zip entry. An already-open zip handle can be
+    passed via `zf` (parse_docx opens the DOCX once for all extractors).
+    """
     blocks: list[dict] = []
+    rpr_cache: dict[int, tuple[ET.Element, bool]] = {}
 
-    with zipfile.ZipFile(docx_path) as z:
+    ctx = contextlib.nullcontext(zf) if zf is not None else zipfile.ZipFile(docx_path)
+    with ctx as z:
         document_xml = z.read("word/document.xml")
         rels_xml = z.read("word/_rels/document.xml.rels")
 
@@ -375,18 +543,18 @@ def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
 
     # Map rId -> image filename.
     rel_map: dict[str, str] = {}
-    for rel in rels_root.findall(f".//{PR}Relationship"):
+    for rel in rels_root.findall(_PR_RELATIONSHIP_PATH):
         rel_type = rel.get("Type", "")
         if "image" in rel_type:
             rel_map[rel.get("Id")] = Path(rel.get("Target", "")).name
 
     def parse_run(run: ET.Element) -> list[dict]:
         run_blocks: list[dict] = []
-        run_highlight = _run_has_highlight(run)
+        run_highlight = _run_has_highlight(run, rpr_cache)
 
         for child in list(run):
             # TEXT
-            if child.tag == f"{W}t" and child.text:
+            if child.tag == _W_T and child.text:
                 run_blocks.append(
                     {
                         "type": "text",
@@ -396,10 +564,10 @@ def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
                 )
 
             # MATH (OMML)
-            if child.tag in (f"{M}oMath", f"{M}oMathPara"):
+            if child.tag in (_M_OMATH, _M_OMATHPARA):
                 mathml = _omml_to_mathml(
                     child,
-                    display="block" if child.tag == f"{M}oMathPara" else "inline",
+                    display="block" if child.tag == _M_OMATHPARA else "inline",
                 )
                 if mathml:
                     run_blocks.append(
@@ -411,7 +579,7 @@ def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
                     )
 
             # TAB
-            if child.tag == f"{W}tab":
+            if child.tag == _W_TAB:
                 run_blocks.append(
                     {
                         "type": "text",
@@ -421,25 +589,33 @@ def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
                 )
 
             # LINE BREAKS INSIDE PARAGRAPH
-            if child.tag in (f"{W}br", f"{W}cr"):
+            if child.tag in (_W_BR, _W_CR):
                 kind = "line"
-                if child.tag == f"{W}br":
-                    br_type = child.get(f"{W}type") or child.get("type")
+                if child.tag == _W_BR:
+                    br_type = child.get(_W_TYPE) or child.get("type")
                     if br_type in ("page", "column"):
                         kind = "page"
                 run_blocks.append({"type": "newline", "kind": kind})
 
             # IMAGE (DrawingML)
-            if child.tag == f"{W}drawing":
-                blip = child.find(f".//{A}blip")
+            if child.tag == _W_DRAWING:
+                # blip and extent live in the same inline subtree; grab both
+                # in one walk instead of two .// descents.
+                blip = extent = None
+                for node in child.iter():
+                    if blip is None and node.tag == _A_BLIP:
+                        blip = node
+                    elif extent is None and node.tag == _WP_EXTENT:
+                        extent = node
+                    if blip is not None and extent is not None:
+                        break
                 if blip is None:
                     continue
-                rid = blip.get(f"{R}embed")
+                rid = blip.get(_R_EMBED)
                 filename = rel_map.get(rid)
                 if not filename:
                     continue
 
-                extent = child.find(f".//{WP}extent")
                 width = _emu_to_px(extent.get("cx") if extent is not None else None)
                 height = _emu_to_px(extent.get("cy") if extent is not None else None)
 
@@ -455,20 +631,25 @@ def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
                 )
 
             # IMAGE (VML / OLE equation preview)
-            if child.tag in (f"{W}object", f"{W}pict"):
-                imagedata = child.find(f".//{V}imagedata")
+            if child.tag in (_W_OBJECT, _W_PICT):
+                imagedata = shape = ole = None
+                for node in child.iter():
+                    if imagedata is None and node.tag == _V_IMAGEDATA:
+                        imagedata = node
+                    elif shape is None and node.tag == _V_SHAPE:
+                        shape = node
+                    elif ole is None and node.tag == _O_OLE:
+                        ole = node
                 if imagedata is None:
                     continue
-                rid = imagedata.get(f"{R}id") or imagedata.get(f"{R}href")
+                rid = imagedata.get(_R_ID) or imagedata.get(_R_HREF)
                 filename = rel_map.get(rid)
                 if not filename:
                     continue
 
-                shape = child.find(f".//{V}shape")
                 width, height = _style_pt_to_px(shape.get("style") if shape is not None else None)
 
                 kind = "image"
-                ole = child.find(f".//{O}OLEObject")
                 if ole is not None and "Equation" in (ole.get("ProgID") or ""):
                     kind = "formula"
 
@@ -488,35 +669,15 @@ def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
     def parse_paragraph(paragraph: ET.Element) -> list[dict]:
         paragraph_blocks: list[dict] = []
 
-        def iter_inlines(container: ET.Element):
-            for child in list(container):
-                if child.tag == f"{W}hyperlink":
-                    yield from iter_inlines(child)
-                    continue
-
-                # Content control wrapper
-                if child.tag == f"{W}sdt":
-                    sdt_content = child.find(f"./{W}sdtContent")
-                    if sdt_content is not None:
-                        yield from iter_inlines(sdt_content)
-                    continue
-
-                # SmartTag wrapper
-                if child.tag == f"{W}smartTag":
-                    yield from iter_inlines(child)
-                    continue
-
-                yield child
-
-        for inline in iter_inlines(paragraph):
-            if inline.tag == f"{W}r":
+        for inline in _iter_wrapped(paragraph, _INLINE_SCAN_TAGS):
+            if inline.tag == _W_R:
                 paragraph_blocks.extend(parse_run(inline))
                 continue
 
-            if inline.tag in (f"{M}oMath", f"{M}oMathPara"):
+            if inline.tag in (_M_OMATH, _M_OMATHPARA):
                 mathml = _omml_to_mathml(
                     inline,
-                    display="block" if inline.tag == f"{M}oMathPara" else "inline",
+                    display="block" if inline.tag == _M_OMATHPARA else "inline",
                 )
                 if mathml:
                     paragraph_blocks.append(
@@ -534,25 +695,25 @@ def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
     def parse_table(table: ET.Element) -> dict:
         rows: list[list[dict]] = []
 
-        for tr in table.findall(f"./{W}tr"):
+        for tr in table.findall(_W_TR_PATH):
             row: list[dict] = []
-            for tc in tr.findall(f"./{W}tc"):
+            for tc in tr.findall(_W_TC_PATH):
                 colspan = 1
-                tc_pr = tc.find(f"./{W}tcPr")
+                tc_pr = tc.find(_W_TCPR_PATH)
                 if tc_pr is not None:
-                    grid_span = tc_pr.find(f"./{W}gridSpan")
+                    grid_span = tc_pr.find(_W_GRID_SPAN_PATH)
                     if grid_span is not None:
-                        raw = grid_span.get(f"{W}val") or grid_span.get("val")
+                        raw = grid_span.get(_W_VAL) or grid_span.get("val")
                         try:
                             colspan = max(1, int(raw)) if raw else 1
                         except ValueError:
                             colspan = 1
 
                 cell_blocks: list[dict] = []
-                for child in iter_blocks(tc):
-                    if child.tag == f"{W}p":
+                for child in _iter_wrapped(tc, _BLOCK_SCAN_TAGS):
+                    if child.tag == _W_P:
                         cell_blocks.extend(parse_paragraph(child))
-                    elif child.tag == f"{W}tbl":
+                    elif child.tag == _W_TBL:
                         cell_blocks.append(parse_table(child))
 
                 if cell_blocks and cell_blocks[-1].get("type") == "newline":
@@ -563,34 +724,16 @@ def parse_flow(docx_path: str, image_dir: str = "extracted_images"):
 
         return {"type": "table", "rows": rows}
 
-    def iter_blocks(container: ET.Element):
-        for child in list(container):
-            if child.tag in (f"{W}p", f"{W}tbl"):
-                yield child
-                continue
-
-            # Content control wrapper
-            if child.tag == f"{W}sdt":
-                sdt_content = child.find(f"./{W}sdtContent")
-                if sdt_content is not None:
-                    yield from iter_blocks(sdt_content)
-                continue
-
-            # SmartTag wrapper (rare, but appears in some docs)
-            if child.tag == f"{W}smartTag":
-                yield from iter_blocks(child)
-                continue
-
-    body = root.find(f"{W}body")
+    body = root.find(_W_BODY)
     if body is None:
-        return blocks
+        return (blocks, root) if with_root else blocks
 
     # Iterate top-level block elements in body order (keeps tables intact).
-    for child in iter_blocks(body):
-        if child.tag == f"{W}p":
+    for child in _iter_wrapped(body, _BLOCK_SCAN_TAGS):
+        if child.tag == _W_P:
             blocks.extend(parse_paragraph(child))
-        elif child.tag == f"{W}tbl":
+        elif child.tag == _W_TBL:
             blocks.append(parse_table(child))
             blocks.append({"type": "newline", "kind": "paragraph"})
 
-    return blocks
+    return (blocks, root) if with_root else blocks
@@ -1,5 +1,6 @@
 import zipfile
-import xml.etree.ElementTree as ET
+
+from lxml import etree as ET
 
 NS_M = "http://schemas.openxmlformats.org/officeDocument/2006/math"
 M = f"{{{NS_M}}}"
@@ -7,22 +8,24 @@ M = f"{{{NS_M}}}"
 # region Công thức OMML
 
 # Hàm để trích xuất công thức từ file .docx
-def extract_formulas(docx_path: str):
+def extract_formulas(docx_path: str, root: ET.Element | None = None):
     """
     Trả về danh sách công thức (OMML XML string).
 
+    Nhận `root` (cây `word/document.xml` đã parse, ví dụ từ `parse_flow`) để
+    khỏi mở zip và parse XML lần thứ hai.
+
     Lưu ý: Nhiều file Word cũ/MathType/Equation Editor sẽ lưu công thức dạng OLE + ảnh preview,
     khi đó danh sách này có thể rỗng và công thức sẽ được lấy qua `flow` như image.
     """
-    formulas: list[str] = []
-
-    with zipfile.ZipFile(docx_path) as z:
-        xml_content = z.read("word/document.xml")
-
-    root = ET.fromstring(xml_content)
+    if root is None:
+        with zipfile.ZipFile(docx_path) as z:
+            xml_content = z.read("word/document.xml")
+        root = ET.fromstring(xml_content)
 
+    formulas: list[str] = []
     for elem in root.iter(f"{M}oMath"):
         formulas.append(ET.tostring(elem, encoding="unicode"))
 
     return formulas
-# endregion
\ No newline at end of file
+# endregion
@@ -1,4 +1,8 @@
+import contextlib
+import shutil
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # region Ảnh từ file .docx
@@ -8,30 +12,45 @@ def extract_images(
     docx_path: str,
     output_dir: str | Path = "extracted_images",
     public_dir: str | None = None,
+    zf: zipfile.ZipFile | None = None,
 ):
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
     public_dir = (public_dir or output_dir.name).strip("/")
 
-    images: list[str] = []
-
-    with zipfile.ZipFile(docx_path) as z:
-        for name in z.namelist():
-            if not name.startswith("word/media/"):
-                continue
-
-            data = z.read(name)
-            filename = Path(name).name
-            out_path = output_dir / filename
+    # Reuse an already-open zip handle (parse_docx opens the DOCX once).
+    ctx = contextlib.nullcontext(zf) if zf is not None else zipfile.ZipFile(docx_path)
+    with ctx as z:
+        media_names = [name for name in z.namelist() if name.startswith("word/media/")]
+
+        if len(media_names) <= 2:
+            for name in media_names:
+                # Stream instead of z.read() so large images never sit fully in RAM.
+                with z.open(name) as src, open(output_dir / Path(name).name, "wb") as dst:
+                    shutil.copyfileobj(src, dst, length=65536)
+        else:
+            # ZipFile reads aren't thread-safe, so decompress under a lock and
+            # let the disk writes overlap across threads.
+            lock = threading.Lock()
+
+            def _extract_one(name: str) -> None:
+                with lock:
+                    data = z.read(name)
+                with open(output_dir / Path(name).name, "wb") as f:
+                    f.write(data)
+
+            with ThreadPoolExecutor(max_workers=min(8, len(media_names))) as pool:
+                for _ in pool.map(_extract_one, media_names):
+                    pass
 
-            with open(out_path, "wb") as f:
-                f.write(data)
-
-            # Use POSIX-style paths so they work as browser URLs (Windows paths use `\`).
-            if public_dir:
-                images.append(f"{public_dir}/{filename}")
-            else:
-                images.append(filename)
+    images: list[str] = []
+    for name in media_names:
+        filename = Path(name).name
+        # Use POSIX-style paths so they work as browser URLs (Windows paths use `\`).
+        if public_dir:
+            images.append(f"{public_dir}/{filename}")
+        else:
+            images.append(filename)
 
     return images
-# endregion
\ No newline at end of file
+# endregion
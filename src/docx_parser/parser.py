@@ -1,3 +1,4 @@
+import zipfile
 from pathlib import Path
 
 from .convert_images import convert_wmf_to_png
@@ -19,11 +20,23 @@ def parse_docx(
     image_output_dir = Path(image_output_dir)
     image_public_dir = (image_public_dir or image_output_dir.name).strip("/")
 
-    images = extract_images(
-        docx_path,
-        output_dir=image_output_dir,
-        public_dir=image_public_dir,
-    )
+    # Open the DOCX zip once and share the handle across extractors instead of
+    # letting each one rescan the central directory.
+    with zipfile.ZipFile(docx_path) as zf:
+        images = extract_images(
+            docx_path,
+            output_dir=image_output_dir,
+            public_dir=image_public_dir,
+            zf=zf,
+        )
+        # Keep the parsed document.xml tree so formula extraction reuses it.
+        flow, document_root = parse_flow(
+            docx_path,
+            image_dir=image_public_dir,
+            with_root=True,
+            zf=zf,
+        )
+
     try:
         convert_wmf_to_png(str(image_output_dir))
     except Exception as e:
@@ -39,7 +52,6 @@ def parse_docx(
             final_images.append(img)
 
     texts = extract_text_with_highlight(docx_path)
-    flow = parse_flow(docx_path, image_dir=image_public_dir)
 
     def replace_wmf_in_blocks(blocks: list[dict]):
         for block in blocks:
@@ -71,7 +83,7 @@ def parse_docx(
 
     return {
         "texts": texts,
-        "formulas": extract_formulas(docx_path),
+        "formulas": extract_formulas(docx_path, root=document_root),
         "images": final_images,
         "flow": flow,
         "questions": parse_questions(texts=texts, flow=flow),
@@ -1,27 +1,42 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
+_TRAILING_DOT_RE = re.compile(r"\s*\.$")
+_WS_RE = re.compile(r"\s+")
 
-def split_flow_into_lines(flow: List[Dict[str, Any]]) -> List[Tuple[List[Dict[str, Any]], str | None]]:
-    lines: List[Tuple[List[Dict[str, Any]], str | None]] = []
+
+def split_flow_into_lines(flow: List[Dict[str, Any]]) -> Iterator[Tuple[List[Dict[str, Any]], str | None]]:
+    # Generator: callers consume lines one at a time, so a long flow never
+    # materializes its full line list.
     current: List[Dict[str, Any]] = []
 
     for block in flow:
         if isinstance(block, dict) and block.get("type") == "newline":
             kind = block.get("kind") or "line"
-            lines.append((current, kind))
+            yield current, kind
             current = []
             continue
         current.append(block)
 
-    lines.append((current, None))
-    return lines
+    yield current, None
 
 
 def line_plain_text(blocks: Iterable[Dict[str, Any]]) -> str:
-    return "".join(b.get("value", "") for b in blocks if isinstance(b, dict) and b.get("type") == "text")
+    # Runs once per line; a plain loop with early-outs for the empty and
+    # single-segment cases beats a generator-expression join.
+    parts: List[str] = []
+    for b in blocks:
+        if type(b) is dict and b.get("type") == "text":
+            value = b.get("value")
+            if value:
+                parts.append(value)
+    if not parts:
+        return ""
+    if len(parts) == 1:
+        return parts[0]
+    return "".join(parts)
 
 
 def strip_prefix_from_blocks(blocks: List[Dict[str, Any]], chars_to_strip: int) -> List[Dict[str, Any]]:
@@ -57,14 +72,20 @@ def strip_prefix_from_blocks(blocks: List[Dict[str, Any]], chars_to_strip: int)
 
 
 def _block_any_highlight(block: Dict[str, Any]) -> bool:
-    if bool(block.get("highlight")):
-        return True
-    if block.get("type") == "table":
-        for row in block.get("rows", []) or []:
-            for cell in row or []:
-                for inner in cell.get("blocks", []) or []:
-                    if isinstance(inner, dict) and _block_any_highlight(inner):
-                        return True
+    # Explicit stack instead of recursion: nested tables no longer pay a
+    # Python call frame per level, and deeply nested docs can't hit the
+    # recursion limit.
+    stack = [block]
+    while stack:
+        current = stack.pop()
+        if bool(current.get("highlight")):
+            return True
+        if current.get("type") == "table":
+            for row in current.get("rows", []) or []:
+                for cell in row or []:
+                    for inner in cell.get("blocks", []) or []:
+                        if isinstance(inner, dict):
+                            stack.append(inner)
     return False
 
 
@@ -94,14 +115,14 @@ def blocks_to_text(blocks: Iterable[Dict[str, Any]]) -> str:
         elif btype == "table":
             parts.append("[table]")
 
-    text = "".join(parts)
-    return " ".join(text.replace("\n", " ").split()).strip()
+    # One regex pass instead of replace + split + join over the same string.
+    return _WS_RE.sub(" ", "".join(parts)).strip()
 
 
 def clean_option_text(text: str, *, qtype: str) -> str:
     text = text.strip()
     if qtype == "fa":
         # Inline FA options commonly use '.' as a delimiter between options.
-        text = re.sub(r"\s*\.$", "", text)
+        text = _TRAILING_DOT_RE.sub("", text)
     return text.strip()
 
@@ -1,42 +1,83 @@
 from docx import Document
-from docx.enum.text import WD_COLOR_INDEX
 from docx.oxml.ns import qn
 
-
-def _run_has_highlight(run) -> bool:
+# Resolved once; qn() rebuilds the Clark-notation string on every call and the
+# run walk below touches every run in the document.
+_QN_P = qn("w:p")
+_QN_R = qn("w:r")
+_QN_RPR = qn("w:rPr")
+_QN_T = qn("w:t")
+_QN_TAB = qn("w:tab")
+_QN_BR = qn("w:br")
+_QN_CR = qn("w:cr")
+_QN_TYPE = qn("w:type")
+_QN_NOBREAKHYPHEN = qn("w:noBreakHyphen")
+_QN_PTAB = qn("w:ptab")
+_QN_HIGHLIGHT = qn("w:highlight")
+_QN_VAL = qn("w:val")
+_QN_SHD = qn("w:shd")
+_QN_FILL = qn("w:fill")
+
+# "default" is what python-docx exposes as WD_COLOR_INDEX.AUTO.
+_IGNORE_HIGHLIGHTS = frozenset({"", "none", "default"})
+_IGNORE_FILLS = frozenset({"", "auto", "none", "000000"})
+
+
+def _rpr_has_highlight(rpr) -> bool:
     """
-    Determine whether a run is highlighted.
+    Determine whether run properties mark the run as highlighted.
 
     Supports both the explicit highlight property and shaded runs that set the fill
     color (common when users "paint" text).
     """
-    try:
-        if run.font.highlight_color and run.font.highlight_color != WD_COLOR_INDEX.AUTO:
+    highlight = rpr.find(_QN_HIGHLIGHT)
+    if highlight is not None:
+        val = (highlight.get(_QN_VAL) or "").lower()
+        if val not in _IGNORE_HIGHLIGHTS:
+            return True
+
+    shd = rpr.find(_QN_SHD)
+    if shd is not None:
+        fill = (
+            shd.get(_QN_FILL)
+            or shd.get("w:fill")
+            or shd.get("fill")
+            or ""
+        )
+        # Word stores yellow as FFFF00; treat any non-empty fill as highlight.
+        if fill.lower() not in _IGNORE_FILLS:
             return True
-    except Exception:
-        pass
-
-    try:
-        rpr = run._element.rPr  # noqa: SLF001
-        if rpr is not None:
-            shd = rpr.find(qn("w:shd"))
-            if shd is not None:
-                fill = (
-                    shd.get(qn("w:fill"))
-                    or shd.get("w:fill")
-                    or shd.get("fill")
-                    or ""
-                )
-                fill = fill.lower()
-                # Word stores yellow as FFFF00; treat any non-empty fill as highlight.
-                if fill and fill not in {"auto", "none", "000000"}:
-                    return True
-    except Exception:
-        pass
 
     return False
 
 
+def _run_has_highlight(r) -> bool:
+    rpr = r.find(_QN_RPR)
+    return rpr is not None and _rpr_has_highlight(rpr)
+
+
+def _run_text(r) -> str:
+    # Same text python-docx's Run.text produces (tabs and breaks included),
+    # without constructing a wrapper object per run.
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == _QN_T:
+            if child.text:
+                parts.append(child.text)
+        elif tag == _QN_TAB or tag == _QN_PTAB:
+            parts.append("\t")
+        elif tag == _QN_BR:
+            # Page/column breaks carry no text; only textWrapping breaks do.
+            if (child.get(_QN_TYPE) or "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == _QN_CR:
+            parts.append("\n")
+        elif tag == _QN_NOBREAKHYPHEN:
+            parts.append("-")
+    return "".join(parts)
+
+
 def extract_text_with_highlight(docx_path: str):
     """
     Return list of paragraphs with highlight information:
@@ -47,15 +88,18 @@ def extract_text_with_highlight(docx_path: str):
     doc = Document(docx_path)
     results = []
 
-    for p in doc.paragraphs:
-        text = ""
+    # Walk the lxml tree directly; doc.paragraphs / p.runs would build a
+    # Python wrapper object per run, which dominates on large exam docs.
+    for p in doc.element.body.iterchildren(_QN_P):
+        parts = []
         has_highlight = False
 
-        for run in p.runs:
-            text += run.text
-            if _run_has_highlight(run):
+        for run in p.iterchildren(_QN_R):
+            parts.append(_run_text(run))
+            if not has_highlight and _run_has_highlight(run):
                 has_highlight = True
 
+        text = "".join(parts)
         if text.strip():
             results.append(
                 {
@@ -86,14 +130,15 @@ def extract_paragraph_runs(docx_path: str):
     doc = Document(docx_path)
     results = []
 
-    for p in doc.paragraphs:
+    for p in doc.element.body.iterchildren(_QN_P):
         segments = []
-        for run in p.runs:
-            if not run.text:
+        for run in p.iterchildren(_QN_R):
+            run_text = _run_text(run)
+            if not run_text:
                 continue
             segments.append(
                 {
-                    "text": run.text,
+                    "text": run_text,
                     "highlight": _run_has_highlight(run),
                 }
             )
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import functools
 import os
 import platform
 import shutil
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
@@ -30,6 +32,7 @@ def _looks_like_path(value: str) -> bool:
     return any(sep in value for sep in ("/", "\\")) or value.lower().endswith(".exe")
 
 
+@functools.lru_cache(maxsize=1)
 def resolve_imagemagick(base_dir: Path | None = None) -> ImageMagickConfig | None:
     """
     Resolve an ImageMagick CLI entrypoint in a cross-platform way.
@@ -37,6 +40,9 @@ def resolve_imagemagick(base_dir: Path | None = None) -> ImageMagickConfig | Non
     - Override via IMAGEMAGICK_BIN / MAGICK_BIN
     - Windows: prefer bundled `src/tools/magick.exe` if present
     - Linux/macOS: prefer `magick`, then `convert` (ImageMagick 6)
+
+    The env probes and PATH/filesystem lookups only need to happen once per
+    process, so the result is cached (both callers pass the same base_dir).
     """
 
     override = (os.getenv("IMAGEMAGICK_BIN") or os.getenv("MAGICK_BIN") or "").strip()
@@ -165,25 +171,27 @@ def _atomic_replace(src: Path, dst: Path) -> None:
     os.replace(src, dst)
 
 
-_MAGICK_FORMAT_CACHE: dict[str, bool] = {}
+_MAGICK_FORMATS: set[str] | None = None
+
+
+def _magick_formats() -> set[str]:
+    # `magick -list format` is expensive; run it once and keep the full set so
+    # every format query after the first is a plain membership test.
+    global _MAGICK_FORMATS
+    if _MAGICK_FORMATS is None:
+        cp = _run_command(["magick", "-list", "format"])
+        formats: set[str] = set()
+        for line in (cp.stdout or "").splitlines():
+            # Example: "     WEBP* rw+   WebP Image Format (libwebp 1.2.4)"
+            token = line.split(None, 1)[0] if line.strip() else ""
+            if token:
+                formats.add(token.rstrip("*").upper())
+        _MAGICK_FORMATS = formats
+    return _MAGICK_FORMATS
 
 
 def _magick_supports_format(format_name: str) -> bool:
-    # Cache across calls; `magick -list format` can be expensive.
-    key = format_name.strip().upper()
-    cached = _MAGICK_FORMAT_CACHE.get(key)
-    if cached is not None:
-        return cached
-
-    cp = _run_command(["magick", "-list", "format"])
-    supported = False
-    for line in (cp.stdout or "").splitlines():
-        # Example: "     WEBP* rw+   WebP Image Format (libwebp 1.2.4)"
-        if line.lstrip().upper().startswith(key):
-            supported = True
-            break
-    _MAGICK_FORMAT_CACHE[key] = supported
-    return supported
+    return format_name.strip().upper() in _magick_formats()
 
 
 def _imagemagick_identify(path: Path, fmt: str) -> str:
@@ -204,22 +212,35 @@ def _should_use_lossless_webp(raster_path: Path) -> bool:
     # - Non-opaque (alpha) often indicates UI assets/screenshots.
     # - Low unique color count suggests diagrams.
     try:
-        img_type = _imagemagick_identify(raster_path, "%[type]")
-        opaque = _imagemagick_identify(raster_path, "%[opaque]").lower()
+        try:
+            size = raster_path.stat().st_size
+        except FileNotFoundError:
+            return False
+
+        # Tiny images (icons and the like) gain next to nothing from the
+        # lossless decision; skip the identify spawn and take the lossy path.
+        if size < 64 * 1024:
+            return False
+
+        # One identify process instead of one per attribute; each invocation
+        # decodes the image. `%k` (unique colors) may be expensive, so it is
+        # only requested for reasonably sized files.
+        count_colors = size <= 20 * 1024 * 1024
+
+        fmt = "%[type]|%[opaque]|%k" if count_colors else "%[type]|%[opaque]"
+        parts = _imagemagick_identify(raster_path, fmt).split("|")
+        img_type = parts[0] if parts else ""
+        opaque = parts[1].lower() if len(parts) > 1 else ""
+
         if img_type in {"Bilevel", "Grayscale", "GrayscaleAlpha", "Palette", "PaletteAlpha"}:
             return True
         if opaque in {"false", "0", "no"}:
             return True
 
-        # `%k` (unique colors) may be expensive; guard with file size.
-        try:
-            if raster_path.stat().st_size <= 20 * 1024 * 1024:
-                colors_raw = _imagemagick_identify(raster_path, "%k")
-                colors = _try_get_int(colors_raw)
-                if colors is not None and colors <= 512:
-                    return True
-        except FileNotFoundError:
-            return False
+        if count_colors and len(parts) > 2:
+            colors = _try_get_int(parts[2])
+            if colors is not None and colors <= 512:
+                return True
     except Exception:
         # Fall back to a conservative default (lossy) to avoid blocking the pipeline.
         return False
@@ -227,31 +248,64 @@ def _should_use_lossless_webp(raster_path: Path) -> bool:
     return False
 
 
-def _iter_image_files(root: Path) -> Iterable[Path]:
-    for dirpath, _, filenames in os.walk(root):
-        base = Path(dirpath)
-        for name in filenames:
-            yield base / name
-
-
-def _compute_collision_stems(paths: Iterable[Path]) -> set[tuple[Path, str]]:
-    # Returns (parent_dir, stem_lower) pairs that appear multiple times with different extensions.
-    counts: dict[tuple[Path, str], int] = {}
-    for p in paths:
-        key = (p.parent, p.stem.lower())
+def _iter_image_files(root: Path) -> Iterable[tuple[str, str]]:
+    # scandir's DirEntry caches the file type from the directory read, so this
+    # needs no extra stat per entry (os.walk + is_file() paid two). Yields
+    # (dirpath, filename) strings; Path objects are only built where needed.
+    stack = [str(root)]
+    while stack:
+        dirpath = stack.pop()
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield dirpath, entry.name
+
+
+def _compute_collision_stems(keys: Iterable[tuple[str, str]]) -> set[tuple[str, str]]:
+    # Returns (dirpath, stem_lower) pairs that appear multiple times with different extensions.
+    counts: dict[tuple[str, str], int] = {}
+    for key in keys:
         counts[key] = counts.get(key, 0) + 1
     return {key for key, count in counts.items() if count > 1}
 
 
-def _raster_output_path(src: Path, collision_stems: set[tuple[Path, str]]) -> Path:
-    if (src.parent, src.stem.lower()) in collision_stems:
+def _raster_output_path(
+    dirpath: str,
+    stem: str,
+    suffix: str,
+    key: tuple[str, str],
+    collision_stems: set[tuple[str, str]],
+) -> Path:
+    if key in collision_stems:
         # Stable, collision-free naming: image.png -> image_png.webp
-        ext = src.suffix.lower().lstrip(".") or "img"
-        return src.with_name(f"{src.stem}_{ext}.webp")
-    return src.with_suffix(".webp")
+        ext = suffix.lstrip(".") or "img"
+        return Path(os.path.join(dirpath, f"{stem}_{ext}.webp"))
+    return Path(os.path.join(dirpath, f"{stem}.webp"))
+
+
+def _source_stamp(src: Path) -> str | None:
+    try:
+        st = src.stat()
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns} {st.st_size}"
 
 
 def _convert_raster_to_webp(src: Path, dst: Path) -> None:
+    # Sidecar stamp of the exact source (mtime_ns, size): reruns over an
+    # unchanged image skip straight to a stat, without spawning identify or
+    # relying on the cruder mtime ordering check below.
+    meta = dst.with_name(dst.name + ".meta")
+    stamp = _source_stamp(src)
+    if stamp is not None:
+        try:
+            if meta.read_text() == stamp and dst.stat().st_size > 0:
+                return
+        except OSError:
+            pass
+
     if _is_up_to_date(src, dst):
         return
 
@@ -286,6 +340,12 @@ def _convert_raster_to_webp(src: Path, dst: Path) -> None:
         _require_nonempty_file(tmp_out, context=f"Raster→WebP ({src.name})")
         _atomic_replace(tmp_out, dst)
 
+    if stamp is not None:
+        try:
+            meta.write_text(stamp)
+        except OSError:
+            pass
+
 
 def _libreoffice_convert(
     src: Path,
@@ -334,6 +394,60 @@ def _libreoffice_convert(
     return newest
 
 
+def _batch_wmf_to_svg(wmf_paths: list[Path]) -> None:
+    """
+    Best-effort conversion of many WMFs to SVG in one LibreOffice invocation.
+
+    LibreOffice startup costs seconds and dominates per-file conversion, so a
+    single process handling the whole batch amortizes it. Files that fail (or
+    collide on stem) simply fall through to the per-file path afterwards.
+    """
+    pending: list[Path] = []
+    seen_stems: set[str] = set()
+    for wmf in wmf_paths:
+        # Outputs land in one directory keyed by stem; duplicate stems from
+        # different subdirectories would clobber each other, so skip them.
+        if wmf.stem in seen_stems:
+            continue
+        seen_stems.add(wmf.stem)
+        if not _is_up_to_date(wmf, wmf.with_suffix(".svg")):
+            pending.append(wmf)
+
+    if len(pending) < 2:
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as profile_dir:
+        tmpdir_path = Path(tmpdir)
+        profile_uri = "file://" + Path(profile_dir).as_posix()
+
+        _run_command(
+            [
+                "libreoffice",
+                "--headless",
+                "--nologo",
+                "--nodefault",
+                "--nolockcheck",
+                "--norestore",
+                "--invisible",
+                f"-env:UserInstallation={profile_uri}",
+                "--convert-to",
+                "svg",
+                "--outdir",
+                str(tmpdir_path),
+                *map(str, pending),
+            ],
+            timeout_s=max(120, 15 * len(pending)),
+        )
+
+        for wmf in pending:
+            produced = tmpdir_path / f"{wmf.stem}.svg"
+            try:
+                if produced.stat().st_size > 0:
+                    _atomic_replace(produced, wmf.with_suffix(".svg"))
+            except OSError:
+                continue
+
+
 def _wmf_to_svg(wmf_path: Path, svg_path: Path) -> bool:
     if _is_up_to_date(wmf_path, svg_path):
         return True
@@ -425,30 +539,45 @@ def optimize_extracted_images(image_dir: str) -> None:
     if not root.is_dir():
         raise RuntimeError(f"image_dir is not a directory: {root}")
 
-    files = [p for p in _iter_image_files(root) if p.is_file()]
     raster_exts = {".png", ".jpg", ".jpeg"}
-    wmf_exts = {".wmf"}
-
-    raster_sources = [p for p in files if p.suffix.lower() in raster_exts]
-    collision_stems = _compute_collision_stems(raster_sources)
 
-    errors: list[str] = []
-
-    # Raster first (WebP is typically what the web will use even when WMF falls back).
-    for src in raster_sources:
+    # Classify in one walk over plain strings; suffix/stem lowering and Path
+    # construction allocate, so compute each once and only materialize Path
+    # objects at the conversion handoff.
+    raster_sources: list[tuple[str, str, str, str]] = []
+    wmf_sources: list[Path] = []
+    for dirpath, name in _iter_image_files(root):
+        stem, ext = os.path.splitext(name)
+        suffix = ext.lower()
+        if suffix in raster_exts:
+            raster_sources.append((dirpath, name, stem, suffix))
+        elif suffix == ".wmf":
+            wmf_sources.append(Path(dirpath) / name)
+
+    collision_stems = _compute_collision_stems(
+        (dirpath, stem.lower()) for dirpath, _, stem, _ in raster_sources
+    )
+
+    def _optimize_raster(item: tuple[str, str, str, str]) -> list[str]:
+        dirpath, name, stem, suffix = item
+        src = Path(os.path.join(dirpath, name))
+        errs: list[str] = []
         try:
-            dst = _raster_output_path(src, collision_stems)
+            dst = _raster_output_path(
+                dirpath, stem, suffix, (dirpath, stem.lower()), collision_stems
+            )
             _convert_raster_to_webp(src, dst)
             if dst.exists() and dst.stat().st_size > 0 and src.exists():
                 try:
                     src.unlink()
                 except Exception as e:
-                    errors.append(f"Failed to delete source raster {src}: {e}")
+                    errs.append(f"Failed to delete source raster {src}: {e}")
         except Exception as e:
-            errors.append(f"Raster optimize failed for {src}: {e}")
+            errs.append(f"Raster optimize failed for {src}: {e}")
+        return errs
 
-    # WMF: try to preserve vector via SVG; otherwise rasterize.
-    for wmf in (p for p in files if p.suffix.lower() in wmf_exts):
+    def _optimize_wmf(wmf: Path) -> list[str]:
+        errs: list[str] = []
         try:
             svg = wmf.with_suffix(".svg")
             if _wmf_to_svg(wmf, svg):
@@ -456,8 +585,8 @@ def optimize_extracted_images(image_dir: str) -> None:
                     try:
                         wmf.unlink()
                     except Exception as e:
-                        errors.append(f"Failed to delete source WMF {wmf}: {e}")
-                continue
+                        errs.append(f"Failed to delete source WMF {wmf}: {e}")
+                return errs
 
             # Fallback: WMF -> PDF -> WebP(lossless) or PNG if WebP unsupported
             if _magick_supports_format("WEBP"):
@@ -472,9 +601,37 @@ def optimize_extracted_images(image_dir: str) -> None:
                 try:
                     wmf.unlink()
                 except Exception as e:
-                    errors.append(f"Failed to delete source WMF {wmf}: {e}")
+                    errs.append(f"Failed to delete source WMF {wmf}: {e}")
         except Exception as e:
-            errors.append(f"WMF optimize failed for {wmf}: {e}")
+            errs.append(f"WMF optimize failed for {wmf}: {e}")
+        return errs
+
+    errors: list[str] = []
+
+    # Each conversion shells out to magick/libreoffice, so threads are enough
+    # to overlap the per-file work; error order follows submission order.
+    def _run_pass(worker, sources: list) -> None:
+        if not sources:
+            return
+        if len(sources) == 1:
+            errors.extend(worker(sources[0]))
+            return
+        with ThreadPoolExecutor(max_workers=min(len(sources), os.cpu_count() or 2)) as pool:
+            for errs in pool.map(worker, sources):
+                errors.extend(errs)
+
+    # Raster first (WebP is typically what the web will use even when WMF falls back).
+    _run_pass(_optimize_raster, raster_sources)
+
+    # WMF: try to preserve vector via SVG; otherwise rasterize. Convert the
+    # whole batch in one LibreOffice run first so the per-file pass mostly
+    # just sees up-to-date SVGs.
+    if len(wmf_sources) > 1:
+        try:
+            _batch_wmf_to_svg(wmf_sources)
+        except Exception:
+            pass
+    _run_pass(_optimize_wmf, wmf_sources)
 
     if errors:
         raise RuntimeError("optimize_extracted_images encountered errors:\n" + "\n".join(errors))
@@ -1,9 +1,10 @@
 import os
 import time
-import requests
 from pathlib import Path
 from dotenv import load_dotenv
 
+from src.netlify.session import NETLIFY_SESSION
+
 # =================================================
 # LOAD ENV
 # =================================================
@@ -33,13 +34,11 @@ def create_and_deploy_site(zip_path: Path, site_name: str) -> dict:
     print("Zip:", zip_path)
 
     # 1️⃣ Create site
-    create_res = requests.post(
+    create_res = NETLIFY_SESSION.post(
         "https://api.netlify.com/api/v1/sites",
         headers={
             "Authorization": f"Bearer {NETLIFY_TOKEN}",
             "Content-Type": "application/json",
-            "Accept": "application/json",
-            "User-Agent": "alphawave-backend/1.0",
         },
         json={"name": site_name},
     )
@@ -54,14 +53,18 @@ def create_and_deploy_site(zip_path: Path, site_name: str) -> dict:
         raise Exception("Response không có site_id")
 
     # 2️⃣ Deploy zip
-    with open(zip_path, "rb") as f:
-        deploy_res = requests.post(
+    # An open file is a body requests can measure itself, so it streams with
+    # a single correct Content-Length. A generator body would force
+    # Transfer-Encoding: chunked, which must not be combined with a
+    # hand-set length.
+    with open(zip_path, "rb") as zip_file:
+        deploy_res = NETLIFY_SESSION.post(
             f"https://api.netlify.com/api/v1/sites/{site_id}/deploys",
             headers={
                 "Authorization": f"Bearer {NETLIFY_TOKEN}",
                 "Content-Type": "application/zip",
             },
-            data=f,
+            data=zip_file,
         )
 
     if not deploy_res.ok:
@@ -81,39 +84,59 @@ def wait_for_deploy_ready(
     deploy_id: str | None,
     *,
     timeout_seconds: int = 120,
-    poll_interval_seconds: float = 2.0,
+    poll_interval_seconds: float = 0.5,
 ) -> dict | None:
     """
     Poll Netlify deploy state until it's ready (or timeout).
+
+    Polls start fast and back off exponentially (cap 5s), so quick deploys are
+    caught early without hammering the API on slow ones. An ETag-conditional
+    GET lets unchanged states come back as an empty 304, and a Retry-After
+    header from Netlify overrides the local backoff when present.
     """
     if not deploy_id:
         return None
 
     deadline = time.time() + max(1, timeout_seconds)
     last: dict | None = None
+    etag: str | None = None
+    interval = max(0.2, poll_interval_seconds)
 
     while time.time() < deadline:
-        res = requests.get(
+        headers = {"Authorization": f"Bearer {NETLIFY_TOKEN}"}
+        if etag:
+            headers["If-None-Match"] = etag
+
+        res = NETLIFY_SESSION.get(
             f"https://api.netlify.com/api/v1/deploys/{deploy_id}",
-            headers={
-                "Authorization": f"Bearer {NETLIFY_TOKEN}",
-                "Accept": "application/json",
-                "User-Agent": "alphawave-backend/1.0",
-            },
+            headers=headers,
         )
 
-        if not res.ok:
-            raise Exception(f"Không thể kiểm tra deploy: {res.text}")
+        if res.status_code != 304:
+            if not res.ok:
+                raise Exception(f"Không thể kiểm tra deploy: {res.text}")
+
+            etag = res.headers.get("ETag") or etag
+            last = res.json()
+            state = (last.get("state") or "").lower()
 
-        last = res.json()
-        state = (last.get("state") or "").lower()
+            if state in {"ready", "current"}:
+                return last
 
-        if state in {"ready", "current"}:
-            return last
+            if state in {"error", "failed"}:
+                raise Exception(f"Deploy lỗi: state={state}")
 
-        if state in {"error", "failed"}:
-            raise Exception(f"Deploy lỗi: state={state}")
+        # The server knows its own cadence better than our backoff does.
+        retry_after = res.headers.get("Retry-After")
+        if retry_after:
+            try:
+                wait = min(30.0, max(0.2, float(retry_after)))
+            except ValueError:
+                wait = interval
+        else:
+            wait = interval
 
-        time.sleep(max(0.2, poll_interval_seconds))
+        time.sleep(wait)
+        interval = min(5.0, interval * 1.6)
 
     return last
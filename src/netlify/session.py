@@ -0,0 +1,28 @@
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+# =================================================
+# SHARED NETLIFY HTTP SESSION
+# =================================================
+# One keep-alive session for every Netlify API call, so site creation, the
+# zip upload, and each iteration of the deploy poll loop reuse a single
+# TCP+TLS connection instead of paying a handshake per request.
+NETLIFY_SESSION = requests.Session()
+
+NETLIFY_SESSION.headers.update(
+    {
+        "Accept": "application/json",
+        "User-Agent": "alphawave-backend/1.0",
+    }
+)
+
+# Retry only applies to idempotent methods by default, so transient gateway
+# errors on GET polls are retried while site-create POSTs are not.
+NETLIFY_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+    ),
+)
@@ -1,36 +1,146 @@
 from __future__ import annotations
 
-import shutil
+import asyncio
+import copy
+import mmap
+import struct
+import tempfile
 import time
 import zipfile
 from pathlib import Path
 
-import requests
+import httpx
 from fastapi import FastAPI, File, HTTPException, UploadFile
 
+from src.fastzip import append_raw_entry
 
-def deploy_to_netlify(*, zip_path: Path, site_name: str, netlify_token: str):
-    if not netlify_token:
-        raise Exception("NETLIFY_TOKEN chưa cấu hình")
 
-    print("\n=== BẮT ĐẦU DEPLOY ===")
-    print("Site name:", site_name)
-    print("Zip path:", zip_path)
+def _extract_raw(
+    src: zipfile.ZipFile,
+    entry: zipfile.ZipInfo,
+    view: memoryview | None = None,
+):
+    """
+    Pull an entry's compressed bytes and rebuilt metadata out of `src`.
+
+    Returns (ZipInfo, raw) ready for append_raw_entry, or None for entries
+    that can't be raw-copied (encrypted, malformed local header). When `view`
+    (a memoryview over an mmap of the source file) is given, the compressed
+    bytes come straight from the page cache with no intermediate bytes object.
+    """
+    if entry.flag_bits & 0x1:
+        # Encrypted entry: the stream is tied to its original archive keys.
+        return None
+
+    if view is not None:
+        header = bytes(view[entry.header_offset : entry.header_offset + 30])
+    else:
+        fp = src.fp
+        fp.seek(entry.header_offset)
+        header = fp.read(30)
+    if len(header) != 30 or header[:4] != b"PK\x03\x04":
+        return None
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    data_offset = entry.header_offset + 30 + name_len + extra_len
+    if view is not None:
+        raw = view[data_offset : data_offset + entry.compress_size]
+    else:
+        fp.seek(data_offset)
+        raw = fp.read(entry.compress_size)
+
+    zi = zipfile.ZipInfo(entry.filename, date_time=entry.date_time)
+    zi.compress_type = entry.compress_type
+    zi.comment = entry.comment
+    zi.extra = b""
+    zi.create_system = entry.create_system
+    zi.create_version = entry.create_version
+    zi.extract_version = entry.extract_version
+    zi.external_attr = entry.external_attr
+    zi.internal_attr = entry.internal_attr
+    zi.flag_bits = entry.flag_bits
+    zi.CRC = entry.CRC
+    zi.compress_size = entry.compress_size
+    zi.file_size = entry.file_size
+    return zi, raw
+
+
+def _copy_zip_entry(
+    dst: zipfile.ZipFile,
+    src: zipfile.ZipFile,
+    entry: zipfile.ZipInfo,
+    view: memoryview | None = None,
+) -> None:
+    """
+    Append an entry to `dst` by copying its compressed bytes verbatim.
+
+    ZipFile.read + writestr would inflate and re-deflate every byte; both
+    archives already store DEFLATE streams, so the merge only needs to move
+    the raw data and replicate the entry metadata (CRC, sizes, compress_type).
+    Falls back to decompress+recompress for entries that can't be raw-copied.
+    """
+    prepared = _extract_raw(src, entry, view)
+    if prepared is None:
+        dst.writestr(entry, src.read(entry.filename))
+        return
+    zi, raw = prepared
+    append_raw_entry(dst, zi, raw)
+
+
+def _load_dist_entries(dist_zip_path: Path) -> list[tuple[zipfile.ZipInfo, bytes]]:
+    """
+    Read dist.zip once and keep each entry's compressed blob + metadata.
 
+    dist.zip never changes while the server runs, so the per-deploy central
+    directory parse and entry reads collapse into this one-time load.
+    """
+    entries: list[tuple[zipfile.ZipInfo, bytes]] = []
+    with zipfile.ZipFile(dist_zip_path, "r") as dist_zip:
+        for entry in dist_zip.infolist():
+            if entry.is_dir():
+                continue
+            prepared = _extract_raw(dist_zip, entry)
+            if prepared is None:
+                # Store decompressed so the cached blob stays self-contained.
+                data = dist_zip.read(entry.filename)
+                zi = zipfile.ZipInfo(entry.filename, date_time=entry.date_time)
+                zi.compress_type = zipfile.ZIP_STORED
+                zi.external_attr = entry.external_attr
+                zi.CRC = zipfile.crc32(data) & 0xFFFFFFFF
+                zi.compress_size = len(data)
+                zi.file_size = len(data)
+                prepared = (zi, data)
+            entries.append(prepared)
+    return entries
+
+
+async def _zip_chunks(zip_file, chunk_size: int = 1 << 20):
+    # 1 MiB reads through a worker thread: the upload streams without holding
+    # the whole archive in memory or blocking the event loop per read.
+    while True:
+        chunk = await asyncio.to_thread(zip_file.read, chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _create_site(
+    *,
+    client: httpx.AsyncClient,
+    site_name: str,
+    netlify_token: str,
+) -> dict:
     # 1️⃣ Create site
     print("[1/3] Tạo site Netlify...")
-    create_res = requests.post(
+    create_res = await client.post(
         "https://api.netlify.com/api/v1/sites",
         headers={
             "Authorization": f"Bearer {netlify_token}",
             "Content-Type": "application/json",
-            "Accept": "application/json",
-            "User-Agent": "alphawave-backend/1.0",
         },
         json={"name": site_name},
     )
 
-    if not create_res.ok:
+    if create_res.is_error:
         raise Exception(f"Tạo site thất bại: {create_res.text}")
 
     site_json = create_res.json()
@@ -40,20 +150,31 @@ def deploy_to_netlify(*, zip_path: Path, site_name: str, netlify_token: str):
         raise Exception("Response thiếu site ID")
 
     print("Site ID:", site_id)
+    return site_json
 
+
+async def _upload_deploy(
+    *,
+    client: httpx.AsyncClient,
+    site_json: dict,
+    zip_file,
+    zip_size: int,
+    netlify_token: str,
+) -> dict:
     # 2️⃣ Deploy zip
     print("[2/3] Upload ZIP...")
-    with open(zip_path, "rb") as f:
-        deploy_res = requests.post(
-            f"https://api.netlify.com/api/v1/sites/{site_id}/deploys",
-            headers={
-                "Authorization": f"Bearer {netlify_token}",
-                "Content-Type": "application/zip",
-            },
-            data=f,
-        )
-
-    if not deploy_res.ok:
+    deploy_res = await client.post(
+        f"https://api.netlify.com/api/v1/sites/{site_json['id']}/deploys",
+        headers={
+            "Authorization": f"Bearer {netlify_token}",
+            "Content-Type": "application/zip",
+            # Explicit length avoids chunked transfer encoding on the upload.
+            "Content-Length": str(zip_size),
+        },
+        content=_zip_chunks(zip_file),
+    )
+
+    if deploy_res.is_error:
         raise Exception(f"Deploy thất bại: {deploy_res.text}")
 
     deploy_json = deploy_res.json()
@@ -69,71 +190,129 @@ def deploy_to_netlify(*, zip_path: Path, site_name: str, netlify_token: str):
     }
 
 
+def _build_merged_zip(
+    merged_buf,
+    *,
+    dist_entries: list[tuple[zipfile.ZipInfo, bytes]],
+    data_zip_file,
+) -> int:
+    """Merge cached dist entries + _redirects + the data zip into `merged_buf`."""
+    started = time.perf_counter()
+    # ZIP_STORED only affects entries written through writestr (_redirects and
+    # directory markers); raw-copied entries keep their original per-entry
+    # compress_type, so deflated input entries stay deflated. Nothing in the
+    # merge pays for a fresh DEFLATE pass.
+    with zipfile.ZipFile(merged_buf, "w", zipfile.ZIP_STORED) as merged_zip:
+        # 1️⃣ Add dist.zip (precomputed raw-copy plan, no disk I/O)
+        for zi, raw in dist_entries:
+            # append_raw_entry mutates the ZipInfo (header_offset) and the
+            # output keeps a reference to it, so each merge gets a copy.
+            append_raw_entry(merged_zip, copy.copy(zi), raw)
+
+        # 2️⃣ Add _redirects
+        merged_zip.writestr("_redirects", "/* /index.html 200")
+
+        # 3️⃣ Add data.zip, read straight from the upload's spool file
+        data_zip_file.seek(0)
+        with zipfile.ZipFile(data_zip_file, "r") as data_zip:
+            mm = view = None
+            # An unrolled SpooledTemporaryFile has no real fd (asking for one
+            # would force it onto disk); those stay on the seek/read path.
+            if getattr(data_zip_file, "_rolled", True):
+                try:
+                    mm = mmap.mmap(
+                        data_zip_file.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+                    view = memoryview(mm)
+                except (AttributeError, ValueError, OSError):
+                    mm = view = None
+            try:
+                for entry in data_zip.infolist():
+                    if entry.is_dir():
+                        merged_zip.writestr(entry.filename, b"")
+                    else:
+                        _copy_zip_entry(merged_zip, data_zip, entry, view)
+            finally:
+                if view is not None:
+                    view.release()
+                if mm is not None:
+                    mm.close()
+
+        total = len(merged_zip.infolist())
+
+    # One summary line instead of a print (and its write syscall) per entry.
+    print(f"-> Merge xong {total} entries trong {time.perf_counter() - started:.2f}s")
+    return merged_buf.tell()
+
+
 def register_deploy_routes(
     app: FastAPI,
     *,
     netlify_token: str | None,
     dist_zip_path: Path,
-    upload_dir: Path,
 ):
+    # Filled on first deploy; dist.zip is immutable for the process lifetime.
+    dist_entries: list[tuple[zipfile.ZipInfo, bytes]] | None = None
+
     @app.post("/api/deploy")
     @app.post("/api/create")
     async def deploy(file: UploadFile = File(...)):
+        nonlocal dist_entries
+
         if not netlify_token:
             raise HTTPException(500, "Server chưa cấu hình NETLIFY_TOKEN")
 
         if not (file.filename or "").lower().endswith(".zip"):
             raise HTTPException(400, "Chỉ chấp nhận file ZIP")
 
-        if not dist_zip_path.exists():
-            raise HTTPException(400, f"dist.zip không tồn tại tại {dist_zip_path}")
+        if dist_entries is None:
+            if not dist_zip_path.exists():
+                raise HTTPException(400, f"dist.zip không tồn tại tại {dist_zip_path}")
+            dist_entries = await asyncio.to_thread(_load_dist_entries, dist_zip_path)
 
         timestamp = int(time.time() * 1000)
 
-        data_zip_path = upload_dir / f"data_{timestamp}.zip"
-        merged_zip_path = upload_dir / f"dist_with_data_{timestamp}.zip"
-
-        # Save uploaded zip
-        with open(data_zip_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        # Merged archive stays in memory (spills to disk past 64 MiB) and is
+        # posted straight to Netlify: no second on-disk zip to write, reread
+        # and unlink per deploy.
+        merged_buf = tempfile.SpooledTemporaryFile(max_size=64 << 20)
 
         try:
-            # Merge zip
-            with zipfile.ZipFile(
-                merged_zip_path,
-                "w",
-                zipfile.ZIP_DEFLATED,
-            ) as merged_zip:
-                # 1️⃣ Add dist.zip
-                with zipfile.ZipFile(dist_zip_path, "r") as dist_zip:
-                    for entry in dist_zip.infolist():
-                        if not entry.is_dir():
-                            merged_zip.writestr(
-                                entry.filename,
-                                dist_zip.read(entry.filename),
-                            )
-
-                # 2️⃣ Add _redirects
-                merged_zip.writestr("_redirects", "/* /index.html 200")
-                print("-> Đã thêm _redirects")
-
-                # 3️⃣ Add data.zip
-                with zipfile.ZipFile(data_zip_path, "r") as data_zip:
-                    for entry in data_zip.infolist():
-                        if entry.is_dir():
-                            merged_zip.writestr(entry.filename, b"")
-                        else:
-                            merged_zip.writestr(
-                                entry.filename,
-                                data_zip.read(entry.filename),
-                            )
-                        print(f"-> Merge data entry: {entry.filename}")
-
-            # Deploy to Netlify
             site_name = f"alphawave-quiz-{timestamp}"
-            result = deploy_to_netlify(
-                zip_path=merged_zip_path,
-                site_name=site_name,
+            print("\n=== BẮT ĐẦU DEPLOY ===")
+            print("Site name:", site_name)
+
+            # Site creation only waits on the Netlify API and is independent
+            # of the merge, so both run concurrently: the merge happens in a
+            # worker thread while the create request is in flight.
+            site_task = asyncio.create_task(
+                _create_site(
+                    client=app.state.netlify,
+                    site_name=site_name,
+                    netlify_token=netlify_token,
+                )
+            )
+            try:
+                # The upload's spool file is already seekable; merging
+                # straight from it skips writing, rereading and unlinking a
+                # data_*.zip copy in the upload dir.
+                merged_size = await asyncio.to_thread(
+                    _build_merged_zip,
+                    merged_buf,
+                    dist_entries=dist_entries,
+                    data_zip_file=file.file,
+                )
+                site_json = await site_task
+            except BaseException:
+                site_task.cancel()
+                raise
+
+            merged_buf.seek(0)
+            result = await _upload_deploy(
+                client=app.state.netlify,
+                site_json=site_json,
+                zip_file=merged_buf,
+                zip_size=merged_size,
                 netlify_token=netlify_token,
             )
 
@@ -145,9 +324,5 @@ def register_deploy_routes(
             print("❌ Lỗi deploy:", str(e))
             raise HTTPException(500, str(e))
         finally:
-            for p in [data_zip_path, merged_zip_path]:
-                try:
-                    p.unlink()
-                except Exception:
-                    pass
+            merged_buf.close()
 
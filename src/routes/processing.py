@@ -1,16 +1,112 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import os
 import shutil
 import time
 import traceback
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from fastapi import BackgroundTasks, FastAPI, File, HTTPException, UploadFile
 from fastapi.responses import FileResponse, JSONResponse
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
 from src.docx_parser.parser import parse_docx
+from src.fastzip import append_raw_entry
+from src.routes.uploads import save_upload
+
+
+# Image formats whose payloads are already compressed.
+_STORED_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".webp", ".gif"})
+
+
+def _prepare_entry(path: Path, arcname: str) -> tuple[zipfile.ZipInfo, bytes]:
+    """Read and pre-compress one file, ready for append_raw_entry."""
+    data = path.read_bytes()
+    zi = zipfile.ZipInfo.from_file(path, arcname)
+    zi.CRC = zipfile.crc32(data) & 0xFFFFFFFF
+    zi.file_size = len(data)
+
+    if path.suffix.lower() in _STORED_SUFFIXES:
+        # Already-compressed payloads go in verbatim (see chunk above).
+        zi.compress_type = zipfile.ZIP_STORED
+        blob = data
+    else:
+        zi.compress_type = zipfile.ZIP_DEFLATED
+        # Raw deflate stream (no zlib header), matching what zipfile writes.
+        comp = zipfile.zlib.compressobj(1, zipfile.zlib.DEFLATED, -15)
+        blob = comp.compress(data) + comp.flush()
+
+    zi.compress_size = len(blob)
+    return zi, blob
+
+
+def _process_docx(work_dir: Path, docx_path: Path, image_dir: Path, timestamp: int) -> Path:
+    """Parse the DOCX and build the result zip; returns the zip path."""
+    result = parse_docx(
+        str(docx_path),
+        image_output_dir=image_dir,
+        image_public_dir="extracted_images",
+    )
+
+    # Compact bytes straight from orjson: no indent to inflate the payload and
+    # no separate UTF-8 encode pass before compression.
+    if orjson is not None:
+        payload = orjson.dumps(result)
+    else:
+        payload = json.dumps(
+            result, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    entries: list[tuple[Path, str]] = []
+    if image_dir.exists():
+        entries = [
+            (path, path.relative_to(work_dir).as_posix())
+            for path in image_dir.rglob("*")
+            if path.is_file() and path.suffix.lower() != ".wmf"
+        ]
+
+    zip_path = work_dir / f"processing_{timestamp}.zip"
+    with open(zip_path, "wb") as zip_fp:
+        # Preallocate one contiguous extent for the archive so the many small
+        # appends don't each trigger a block allocation; images dominate the
+        # size and are stored uncompressed, so their sizes are a good bound.
+        estimated = (
+            len(payload)
+            + sum(path.stat().st_size for path, _ in entries)
+            + 512 * (len(entries) + 1)
+        )
+        try:
+            os.posix_fallocate(zip_fp.fileno(), 0, estimated)
+        except (AttributeError, OSError):
+            pass
+
+        with zipfile.ZipFile(zip_fp, "w", zipfile.ZIP_DEFLATED) as zip_out:
+            # Level 1 compresses the (mostly-text) JSON several times faster
+            # than the default for only a slightly larger entry.
+            zip_out.writestr("data.json", payload, compresslevel=1)
+
+            if entries:
+                # Reads and deflate both release the GIL, so entries are
+                # prepared in parallel; appends stay serial since the
+                # archive is a single sequential stream.
+                workers = min(os.cpu_count() or 2, 8, len(entries))
+                with ThreadPoolExecutor(max_workers=workers) as ex:
+                    prepared = ex.map(lambda item: _prepare_entry(*item), entries)
+                    for zi, blob in prepared:
+                        append_raw_entry(zip_out, zi, blob)
+
+        # Trim the preallocation back to the bytes actually written.
+        zip_fp.truncate(zip_fp.tell())
+
+    return zip_path
 
 
 def register_processing_routes(app: FastAPI, *, upload_dir: Path):
@@ -27,33 +123,15 @@ def register_processing_routes(app: FastAPI, *, upload_dir: Path):
 
         work_dir.mkdir(parents=True, exist_ok=True)
 
-        with open(docx_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        save_upload(file.file, docx_path)
 
         try:
-            result = parse_docx(
-                str(docx_path),
-                image_output_dir=image_dir,
-                image_public_dir="extracted_images",
+            # The parse and zip build are CPU/subprocess-bound; running them
+            # in a worker thread keeps the event loop free for other requests.
+            zip_path = await asyncio.to_thread(
+                _process_docx, work_dir, docx_path, image_dir, timestamp
             )
 
-            zip_path = work_dir / f"processing_{timestamp}.zip"
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_out:
-                zip_out.writestr(
-                    "data.json",
-                    json.dumps(result, ensure_ascii=False, indent=2),
-                )
-
-                if image_dir.exists():
-                    for path in image_dir.rglob("*"):
-                        if path.is_file():
-                            if path.suffix.lower() == ".wmf":
-                                continue
-                            zip_out.write(
-                                path,
-                                arcname=path.relative_to(work_dir).as_posix(),
-                            )
-
             background_tasks.add_task(shutil.rmtree, work_dir, ignore_errors=True)
             return FileResponse(
                 zip_path,
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+
+
+def save_upload(src, dst_path: Path) -> None:
+    """
+    Copy an UploadFile's backing file to `dst_path`.
+
+    Starlette spools uploads to a real temp file past its memory threshold;
+    for those, os.sendfile moves the bytes kernel-to-kernel instead of looping
+    them through userspace buffers. Small in-memory uploads (no fileno) fall
+    back to shutil.copyfileobj.
+    """
+    src.seek(0)
+    with open(dst_path, "wb") as dst:
+        try:
+            fd = src.fileno()
+        except (AttributeError, OSError, ValueError):
+            shutil.copyfileobj(src, dst, 1 << 20)
+            return
+
+        size = os.fstat(fd).st_size
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), fd, offset, size - offset)
+                if not sent:
+                    break
+                offset += sent
+        except OSError:
+            src.seek(offset)
+            shutil.copyfileobj(src, dst, 1 << 20)
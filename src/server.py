@@ -1,10 +1,13 @@
 import os
 import tempfile
 from pathlib import Path
+
+import httpx
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from src.fastzip import enable_isal
 from src.routes.deploy import register_deploy_routes
 from src.routes.health import register_health_routes
 from src.routes.processing import register_processing_routes
@@ -17,10 +20,30 @@ ROOT_DIR = BASE_DIR.parent                       # backend
 
 ENV_PATH = ROOT_DIR / ".env"
 DIST_ZIP_PATH = ROOT_DIR / "dist.zip"
+# Uploads are written, read once and deleted within a single request, so a
+# tmpfs keeps them off the block device entirely; /dev/shm is tmpfs on every
+# mainstream Linux distro, unlike /tmp.
+
+
+def _default_upload_base() -> Path:
+    shm = Path("/dev/shm")
+    if shm.is_dir():
+        try:
+            stats = os.statvfs(shm)
+        except OSError:
+            stats = None
+        # Docker caps /dev/shm at 64 MiB unless --shm-size is raised, which
+        # is too small for a processing workspace (DOCX + extracted images +
+        # preallocated result zip). Only prefer it with real headroom.
+        if stats is not None and stats.f_frsize * stats.f_bavail >= 256 << 20:
+            return shm
+    return Path(tempfile.gettempdir())
+
+
 UPLOAD_DIR = Path(
     os.getenv(
         "UPLOAD_DIR",
-        str(Path(tempfile.gettempdir()) / "alphawave_uploads"),
+        str(_default_upload_base() / "alphawave_uploads"),
     )
 )
 
@@ -37,6 +60,11 @@ print(f"[startup] upload dir: {UPLOAD_DIR}", flush=True)
 NETLIFY_TOKEN = os.getenv("NETLIFY_TOKEN")
 PORT = int(os.getenv("PORT", 5001))
 
+if enable_isal():
+    print("[startup] zipfile: ISA-L deflate/crc32 enabled", flush=True)
+else:
+    print("[startup] zipfile: isal not installed, using system zlib", flush=True)
+
 if not NETLIFY_TOKEN:
     print("❌ NETLIFY_TOKEN chưa được set")
 
@@ -75,6 +103,25 @@ except Exception as e:
 # =================================================
 app = FastAPI(title="AlphaWave Deploy API")
 
+
+@app.on_event("startup")
+async def _open_netlify_client() -> None:
+    # Shared async client: Netlify calls reuse one keep-alive connection and
+    # never block the event loop the way synchronous requests did.
+    app.state.netlify = httpx.AsyncClient(
+        timeout=httpx.Timeout(30.0, write=300.0),
+        limits=httpx.Limits(max_keepalive_connections=8),
+        headers={
+            "Accept": "application/json",
+            "User-Agent": "alphawave-backend/1.0",
+        },
+    )
+
+
+@app.on_event("shutdown")
+async def _close_netlify_client() -> None:
+    await app.state.netlify.aclose()
+
 cors_allow_all = (os.getenv("CORS_ALLOW_ALL") or "").strip().lower() in {
     "1",
     "true",
@@ -102,7 +149,6 @@ register_deploy_routes(
     app,
     netlify_token=NETLIFY_TOKEN,
     dist_zip_path=DIST_ZIP_PATH,
-    upload_dir=UPLOAD_DIR,
 )
 register_processing_routes(app, upload_dir=UPLOAD_DIR)
 register_health_routes(app)